@@ -9,7 +9,10 @@ from backend.config import (
     LIVEKIT_URL, ROOM_PREFIX, IDENTITY_PREFIX,
     LIVEKIT_API_KEY, LIVEKIT_API_SECRET
 )
+from backend.llm import scheduler as llm_scheduler
 from backend.llm_router import run_agent
+from backend.speculation import speculator
+from backend.tools.tool_cache import tool_cache
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -22,6 +25,8 @@ app = Flask(
 
 CURRENT = {"room": None, "identity": None}
 
+tool_cache.start_background()
+
 
 @app.get("/")
 def home():
@@ -30,7 +35,8 @@ def home():
 
 @app.get("/api/health")
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "llm": llm_scheduler.stats(), "tool_cache": tool_cache.stats(),
+                    "speculation": speculator.stats()})
 
 
 @app.post("/api/start")
@@ -66,6 +72,16 @@ def stop():
     return jsonify({"ok": True})
 
 
+@app.post("/api/partial")
+def partial():
+    """Interim transcript while the user is still speaking; may start speculative routing."""
+    data = request.get_json(silent=True) or {}
+    session_id = data.get("session")
+    if session_id:
+        speculator.on_partial(session_id, data.get("text") or "")
+    return jsonify({"ok": True})
+
+
 @app.post("/api/ask")
 def ask():
     data = request.get_json(silent=True) or {}
@@ -73,7 +89,12 @@ def ask():
     if not text:
         return jsonify({"error": "Empty question"}), 400
 
-    result = run_agent(text)
+    # no session, no memory: a shared fallback would leak one client's history into another's prompts
+    session_id = data.get("session") or None
+    plan = speculator.take(session_id, text) if session_id else None
+    result = run_agent(text, session_id=session_id, plan=plan)
+    if result.get("error"):
+        return jsonify(result), 503
     return jsonify(result)
 
 
@@ -25,10 +25,35 @@ GEMINI_SYSTEM_PROMPT = env(
     "GEMINI_SYSTEM_PROMPT",
     "You are EchoMind, a helpful assistant. Answer clearly, step-by-step when needed, and be concise."
 )
+GEMINI_API_ENDPOINT = env("GEMINI_API_ENDPOINT")  # optional, e.g. a local fake for testing
+GEMINI_RPM = float(env("GEMINI_RPM", "15"))
+GEMINI_BURST = int(env("GEMINI_BURST", "5"))
+GEMINI_MAX_RETRIES = int(env("GEMINI_MAX_RETRIES", "4"))
 
 # News
 NEWS_API_KEY = env("NEWS_API_KEY")  # optional
 NEWS_COUNTRY = env("NEWS_COUNTRY", "in")  # default India
 
+# Weather
+WEATHER_DEFAULT_LOCATION = env("WEATHER_DEFAULT_LOCATION", "Hyderabad")
+
+# Tool cache / background refresh
+WEATHER_TTL_S = float(env("WEATHER_TTL_S", "900"))
+NEWS_TTL_S = float(env("NEWS_TTL_S", "600"))
+TOOL_REFRESH_INTERVAL_S = float(env("TOOL_REFRESH_INTERVAL_S", "300"))
+TOOL_REFRESH_BUDGET = int(env("TOOL_REFRESH_BUDGET", "10"))  # upstream requests per interval
+TOOL_REFRESH_TOP_N = int(env("TOOL_REFRESH_TOP_N", "20"))
+TOOL_REFRESH_MIN_SCORE = float(env("TOOL_REFRESH_MIN_SCORE", "0.5"))  # one lookup halves to this after a pass
+
+# Speculative routing/tool prefetch on partial transcripts
+SPEC_STABLE_MS = int(env("SPEC_STABLE_MS", "400"))
+SPEC_MIN_WORDS = int(env("SPEC_MIN_WORDS", "3"))
+SPEC_MATCH_RATIO = float(env("SPEC_MATCH_RATIO", "0.9"))
+
 # Router behavior
 ENABLE_LLM_TOOL_SELECTION = (env("ENABLE_LLM_TOOL_SELECTION", "true") or "true").lower() == "true"
+
+# Conversation memory (SQLite)
+MEMORY_DB_PATH = env("MEMORY_DB_PATH", "echomind_memory.sqlite3")
+MEMORY_TOKEN_BUDGET = int(env("MEMORY_TOKEN_BUDGET", "1200"))
+MEMORY_COMPACT_MIN_TOKENS = int(env("MEMORY_COMPACT_MIN_TOKENS", "300"))
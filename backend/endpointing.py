@@ -0,0 +1,212 @@
+"""
+Adaptive end-of-turn detection for the STT worker.
+
+Instead of waiting a fixed END_SILENCE_MS after speech, the Endpointer picks
+how much trailing silence to require from:
+- the energy contour: speech that fades out usually ends a sentence, speech
+  that stops abruptly at full energy is usually a mid-sentence pause;
+- an optional quick partial transcript: a trailing "and"/"the"/"um" holds
+  the turn open, a question mark ends it early. Whisper puts a full stop on
+  nearly everything, so "." only ends the turn early when the energy is
+  trailing off as well.
+
+Offline evaluation (WAV + JSON with ground-truth turns, optionally with
+recorded partial transcripts to evaluate the partial path too):
+    python endpointing.py recordings/
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import sys
+import wave
+
+import numpy as np
+
+CONTINUATION_WORDS = {
+    "and", "but", "or", "so", "because", "the", "a", "an", "to", "of", "in", "on",
+    "for", "with", "my", "is", "are", "what", "um", "uh", "like", "if", "then",
+}
+
+
+class Endpointer:
+    def __init__(
+        self,
+        base_silence_ms: int = 900,
+        min_silence_ms: int = 300,
+        max_silence_ms: int = 1500,
+        tail_ms: int = 300,
+    ):
+        self.base_silence_ms = base_silence_ms
+        self.min_silence_ms = min_silence_ms
+        self.max_silence_ms = max_silence_ms
+        self.tail_ms = tail_ms
+        self.reset()
+
+    def reset(self):
+        self._energy: list[tuple[float, int]] = []  # (rms, frame_ms) of speech frames
+        self._speech_ms = 0
+        self.partial_text: str | None = None
+
+    def observe_speech(self, rms: float, frame_ms: int):
+        self._energy.append((rms, frame_ms))
+        self._speech_ms += frame_ms
+        self.partial_text = None  # any partial is stale once speech resumes
+
+    def _energy_factor(self) -> float:
+        if self._speech_ms < 2 * self.tail_ms:
+            return 1.0
+        tail, acc = [], 0
+        for rms, ms in reversed(self._energy):
+            if acc >= self.tail_ms:
+                break
+            tail.append(rms)
+            acc += ms
+        ratio = float(np.mean(tail)) / max(float(np.mean([e[0] for e in self._energy])), 1.0)
+        if ratio < 0.6:
+            return 0.6   # trailing off
+        if ratio > 1.0:
+            return 1.3   # cut off at full voice, probably pausing
+        return 1.0
+
+    def silence_needed_ms(self) -> int:
+        if self.partial_text is not None:
+            words = re.findall(r"[a-z']+", self.partial_text.lower())
+            if words and words[-1] in CONTINUATION_WORDS:
+                return self.max_silence_ms
+            if self.partial_text.rstrip().endswith("?"):
+                return self.min_silence_ms
+
+        factor = self._energy_factor()
+        if self.partial_text is not None and self.partial_text.rstrip().endswith((".", "!")) and factor < 1.0:
+            return self.min_silence_ms
+        needed = int(self.base_silence_ms * factor)
+        return max(self.min_silence_ms, min(self.max_silence_ms, needed))
+
+
+class FixedEndpointer(Endpointer):
+    """The old behaviour: always wait base_silence_ms."""
+
+    def silence_needed_ms(self) -> int:
+        return self.base_silence_ms
+
+
+def detect_endpoints(pcm: np.ndarray, sample_rate: int, endpointer: Endpointer,
+                     *, frame_ms: int = 20, rms_threshold: int = 500,
+                     partials: list[list] | None = None, partial_after_ms: int = 250) -> list[int]:
+    """
+    Replay the STT worker's segmentation over int16 mono audio; returns endpoint times in ms.
+
+    partials is a recorded [[ms, text], ...] list: once partial_after_ms of
+    silence has passed, the newest partial from the current utterance is
+    handed to the endpointer, as the live worker does with its quick Whisper run.
+    """
+    step = sample_rate * frame_ms // 1000
+    in_speech = False
+    silence_ms = 0
+    speech_start = 0
+    ends = []
+    endpointer.reset()
+
+    for i in range(0, len(pcm) - step + 1, step):
+        frame = pcm[i:i + step].astype(np.float32)
+        rms = float(np.sqrt(np.mean(frame ** 2)))
+        now_ms = (i + step) * 1000 // sample_rate
+        if rms > rms_threshold:
+            if not in_speech:
+                speech_start = now_ms
+            in_speech = True
+            silence_ms = 0
+            endpointer.observe_speech(rms, frame_ms)
+        elif in_speech:
+            silence_ms += frame_ms
+            if partials and endpointer.partial_text is None and silence_ms >= partial_after_ms:
+                recent = [text for t, text in partials if speech_start <= t <= now_ms]
+                if recent:
+                    endpointer.partial_text = recent[-1]
+            if silence_ms >= endpointer.silence_needed_ms():
+                ends.append(now_ms)
+                in_speech = False
+                silence_ms = 0
+                endpointer.reset()
+    return ends
+
+
+def score(ends: list[int], turns: list[list[int]]) -> dict:
+    """An endpoint inside a turn is a premature cut; otherwise latency is measured from the last turn end."""
+    latencies, premature = [], 0
+    for t in ends:
+        if any(start <= t < end for start, end in turns):
+            premature += 1
+            continue
+        before = [end for _, end in turns if end <= t]
+        if before:
+            latencies.append(t - max(before))
+    return {
+        "endpoints": len(ends),
+        "premature": premature,
+        "latencies": latencies,
+    }
+
+
+def _load_wav(path: str) -> tuple[np.ndarray, int]:
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        if w.getnchannels() > 1:
+            pcm = pcm.reshape(-1, w.getnchannels()).mean(axis=1).astype(np.int16)
+        return pcm, w.getframerate()
+
+
+def evaluate(folder: str, settings=(500, 700, 900, 1100)) -> list[dict]:
+    """
+    Each dialog is <name>.wav plus <name>.json: {"turns": [[start_ms, end_ms], ...]}
+    marking where each user turn really starts and ends. An optional
+    "partials": [[ms, text], ...] holds the partial transcripts the live
+    worker produced (its "partial" data-channel events); dialogs that have
+    them are also scored with the partial path ("adaptive+partial").
+    """
+    dialogs = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".wav") and os.path.exists(os.path.join(folder, name[:-4] + ".json")):
+            pcm, sr = _load_wav(os.path.join(folder, name))
+            with open(os.path.join(folder, name[:-4] + ".json")) as f:
+                meta = json.load(f)
+            dialogs.append((pcm, sr, meta["turns"], meta.get("partials")))
+
+    kinds = [("fixed", FixedEndpointer, False), ("adaptive", Endpointer, False)]
+    if any(d[3] for d in dialogs):
+        kinds.append(("adaptive+partial", Endpointer, True))
+
+    rows = []
+    for kind, cls, use_partials in kinds:
+        for base in settings:
+            latencies, premature, endpoints = [], 0, 0
+            for pcm, sr, turns, partials in dialogs:
+                if use_partials and not partials:
+                    continue
+                ends = detect_endpoints(pcm, sr, cls(base_silence_ms=base),
+                                        partials=partials if use_partials else None)
+                s = score(ends, turns)
+                latencies += s["latencies"]
+                premature += s["premature"]
+                endpoints += s["endpoints"]
+            rows.append({
+                "endpointer": kind,
+                "base_silence_ms": base,
+                "mean_latency_ms": round(float(np.mean(latencies)), 1) if latencies else None,
+                "p90_latency_ms": round(float(np.percentile(latencies, 90)), 1) if latencies else None,
+                "premature_cut_rate": round(premature / endpoints, 3) if endpoints else 0.0,
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python endpointing.py <folder with .wav + .json dialogs>")
+        sys.exit(2)
+    print(f"{'endpointer':<16} {'base':>5} {'mean':>7} {'p90':>7} {'premature':>10}")
+    for r in evaluate(sys.argv[1]):
+        print(f"{r['endpointer']:<16} {r['base_silence_ms']:>5} {str(r['mean_latency_ms']):>7} "
+              f"{str(r['p90_latency_ms']):>7} {r['premature_cut_rate']:>10}")
@@ -0,0 +1,119 @@
+"""
+Local stand-in for the Gemini REST API, for exercising LLMScheduler.
+
+It answers generateContent requests and returns 429 RESOURCE_EXHAUSTED
+for the first --fail-first requests. Run it with --check to start it on a
+free port, point ask_gemini at it via GEMINI_API_ENDPOINT, fire a burst of
+concurrent questions, and verify that:
+- retries and bucket penalties happened (rate_limited > 0),
+- identical prompts were coalesced,
+- no provider error text came back as an answer.
+
+    python -m backend.fake_gemini --check
+    python -m backend.fake_gemini --port 8089 --fail-first 5   # serve only
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_server(port: int = 0, fail_first: int = 3) -> ThreadingHTTPServer:
+    state = {"requests": 0, "rate_limited": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            with lock:
+                state["requests"] += 1
+                limited = state["requests"] <= fail_first
+                if limited:
+                    state["rate_limited"] += 1
+
+            if limited:
+                code, payload = 429, {"error": {
+                    "code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                    "status": "RESOURCE_EXHAUSTED",
+                }}
+            else:
+                prompt = "".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+                code, payload = 200, {"candidates": [{
+                    "content": {"role": "model", "parts": [{"text": f"fake answer ({len(prompt)} chars)"}]},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }]}
+
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.state = state
+    return server
+
+
+def check(fail_first: int) -> int:
+    server = make_server(0, fail_first)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # config is read at import time, so set the environment before importing the app modules
+    os.environ["GEMINI_API_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-key")
+    os.environ.setdefault("GEMINI_RPM", "600")
+    from backend.llm import ask_gemini, scheduler
+
+    scheduler.base_backoff_s = 0.2
+    questions = ["what is the capital of France?"] * 4 + [f"question {i}" for i in range(4)]
+    with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+        results = list(pool.map(ask_gemini, questions))
+
+    stats = scheduler.stats()
+    print("server:", server.state)
+    print("scheduler:", stats)
+    for q, r in zip(questions, results):
+        print(f"  ok={r.ok} {q!r} -> {r.text!r}" + (f" [{r.error}]" if r.error else ""))
+    server.shutdown()
+
+    failures = []
+    if stats["rate_limited"] < 1:
+        failures.append("no 429 was retried")
+    if stats["deduped"] < 1:
+        failures.append("identical prompts were not coalesced")
+    if not all(r.ok for r in results):
+        failures.append("some questions failed after retries")
+    if any("429" in r.text or "exhausted" in r.text.lower() for r in results):
+        failures.append("provider error text leaked into an answer")
+    for f in failures:
+        print("FAIL:", f)
+    print("OK" if not failures else "FAILED")
+    return 1 if failures else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Fake Gemini endpoint that rate-limits the first requests.")
+    p.add_argument("--port", type=int, default=8089)
+    p.add_argument("--fail-first", type=int, default=3)
+    p.add_argument("--check", action="store_true", help="run the scheduler against it and report")
+    args = p.parse_args()
+
+    if args.check:
+        sys.exit(check(args.fail_first))
+
+    server = make_server(args.port, args.fail_first)
+    print(f"fake Gemini on http://127.0.0.1:{args.port} (first {args.fail_first} requests get 429)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,70 @@
-#llm.py
 from __future__ import annotations
 from dataclasses import dataclass
 
-from backend.config import GOOGLE_API_KEY, GEMINI_MODEL, GEMINI_SYSTEM_PROMPT
+from backend.config import (
+    GOOGLE_API_KEY, GEMINI_MODEL, GEMINI_SYSTEM_PROMPT,
+    GEMINI_API_ENDPOINT, GEMINI_RPM, GEMINI_BURST, GEMINI_MAX_RETRIES,
+)
+from backend.llm_scheduler import LLMScheduler, Dropped, PRIORITY_ANSWER
+
+scheduler = LLMScheduler(
+    rate_per_s=GEMINI_RPM / 60.0,
+    burst=GEMINI_BURST,
+    max_retries=GEMINI_MAX_RETRIES,
+)
+
+UNAVAILABLE_MESSAGE = "I couldn't get an answer right now. Please try again in a moment."
 
 
 @dataclass
 class LLMResult:
     text: str
+    ok: bool = True
+    error: str = ""
+
+
+def _generate(model_name: str, full_prompt: str) -> str:
+    import google.generativeai as genai
 
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=GOOGLE_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=GOOGLE_API_KEY)
 
-def ask_gemini(user_prompt: str, *, system_prompt: str | None = None, model_name: str | None = None) -> LLMResult:
+    resp = genai.GenerativeModel(model_name).generate_content(full_prompt)
+    return (getattr(resp, "text", "") or "").strip()
+
+
+def ask_gemini(
+    user_prompt: str,
+    *,
+    system_prompt: str | None = None,
+    model_name: str | None = None,
+    history: str | None = None,
+    priority: int = PRIORITY_ANSWER,
+) -> LLMResult:
     if not GOOGLE_API_KEY:
-        return LLMResult("GOOGLE_API_KEY is missing in .env. Add it to enable Gemini answers.")
+        return LLMResult("GOOGLE_API_KEY is missing in .env. Add it to enable Gemini answers.", ok=False)
 
     try:
-        import google.generativeai as genai
+        import google.generativeai  # noqa: F401
     except Exception:
-        return LLMResult("Gemini SDK not installed. Run: pip install google-generativeai")
-
-    genai.configure(api_key=GOOGLE_API_KEY)
+        return LLMResult("Gemini SDK not installed. Run: pip install google-generativeai", ok=False)
 
-    model = genai.GenerativeModel(model_name or GEMINI_MODEL)
+    model_name = model_name or GEMINI_MODEL
     system = system_prompt or GEMINI_SYSTEM_PROMPT
 
-    full_prompt = f"{system}\n\nUser: {user_prompt}\nAssistant:"
+    context = f"{history}\n\n" if history else ""
+    full_prompt = f"{system}\n\n{context}User: {user_prompt}\nAssistant:"
 
     try:
-        resp = model.generate_content(full_prompt)
-        text = getattr(resp, "text", "") or ""
-        text = text.strip()
-        return LLMResult(text if text else "I couldn't generate a response.")
+        text = scheduler.submit(f"{model_name}\n{full_prompt}", lambda: _generate(model_name, full_prompt), priority)
+        if not text:
+            # still a normal (200) answer, but flagged so it is never stored as a summary
+            return LLMResult("I couldn't generate a response.", error="empty response")
+        return LLMResult(text)
+    except Dropped as e:
+        return LLMResult(UNAVAILABLE_MESSAGE, ok=False, error=str(e))
     except Exception as e:
-        return LLMResult(f"Gemini error: {type(e).__name__}: {e}")
+        # provider errors are for logs/debug, never the answer text
+        return LLMResult(UNAVAILABLE_MESSAGE, ok=False, error=f"{type(e).__name__}: {e}")
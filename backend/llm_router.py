@@ -4,10 +4,11 @@ from __future__ import annotations
 import json
 import re
 
-from backend.config import ENABLE_LLM_TOOL_SELECTION
-from backend.llm import ask_gemini
-from backend.tools.weather_tool import get_weather_raw
-from backend.tools.news_tool import get_news_raw
+from backend.config import ENABLE_LLM_TOOL_SELECTION, WEATHER_DEFAULT_LOCATION
+from backend.llm import ask_gemini, LLMResult, UNAVAILABLE_MESSAGE
+from backend.llm_scheduler import PRIORITY_ROUTE
+from backend.memory import conversation_store
+from backend.tools.tool_cache import tool_cache
 from backend.tools.web_search import duckduckgo_search_raw
 
 TOOLS = ["weather", "news", "web_search", "llm_only"]
@@ -30,15 +31,16 @@ def _heuristic_route(user_text: str) -> dict:
 
 def _extract_location(text: str) -> str:
     m = re.search(r"weather in ([a-zA-Z\s]+)", text, re.I)
-    return (m.group(1).strip() if m else "").strip() or "Hyderabad"
+    return (m.group(1).strip() if m else "").strip() or WEATHER_DEFAULT_LOCATION
 
 
 def _extract_topic(text: str) -> str:
-    cleaned = re.sub(r"\b(news|headlines|today|latest|breaking)\b", "", text, flags=re.I).strip()
-    return cleaned or "technology"
+    """"" for a topic-less request: top NEWS_COUNTRY headlines, the key tool_cache keeps warm."""
+    cleaned = re.sub(r"\b(news|headlines|today|latest|breaking)\b|[^\w\s'-]", " ", text, flags=re.I)
+    return " ".join(cleaned.split())
 
 
-def _llm_route(user_text: str) -> dict:
+def _llm_route(user_text: str, history: str = "", priority: int = PRIORITY_ROUTE) -> dict:
     selector_prompt = f"""
 You are a tool-router. Choose the best tool for the user question.
 Prefer llm_only for general knowledge questions that can be answered with known information.
@@ -55,14 +57,19 @@ Return ONLY valid JSON in this schema:
   "args": {{ ... }}
 }}
 
+{history}
+
 User question:
 {user_text}
 """.strip()
 
-    res = ask_gemini(selector_prompt).text
+    res = ask_gemini(selector_prompt, priority=priority)
+    if not res.ok:
+        # routing is the first thing shed under load; heuristics are good enough
+        return _heuristic_route(user_text)
 
     try:
-        data = json.loads(_extract_json(res))
+        data = json.loads(_extract_json(res.text))
         tool = data.get("tool")
         if tool not in TOOLS:
             raise ValueError("invalid tool")
@@ -80,28 +87,67 @@ def _extract_json(text: str) -> str:
     return "{}"
 
 
-def run_agent(user_text: str) -> dict:
-    route = _llm_route(user_text) if ENABLE_LLM_TOOL_SELECTION else _heuristic_route(user_text)
+def run_agent(user_text: str, session_id: str | None = None, plan: dict | None = None) -> dict:
+    """plan, if given, is a plan_turn() result computed ahead of time (e.g. speculatively)."""
+    history = conversation_store.build_context(session_id) if session_id else ""
+    result = _run_agent(user_text, history, plan or plan_turn(user_text, history))
+
+    if session_id and not result.get("error"):
+        conversation_store.add_turn(session_id, "user", user_text)
+        conversation_store.add_turn(session_id, "assistant", result["answer"])
+    return result
+
+
+def _answer(tool: str, raw: str, res: LLMResult) -> dict:
+    result = {"tool_used": tool, "raw_data": raw, "answer": res.text}
+    if not res.ok:
+        # "error" is shown to the user; the provider's own message only goes to "detail"
+        result["error"] = UNAVAILABLE_MESSAGE
+        result["detail"] = res.error
+    return result
+
+
+def plan_turn(user_text: str, history: str = "") -> dict:
+    """Routing + tool fetch: everything before the answer call. Returns {"tool", "args", "raw"}."""
+    return fetch_plan(user_text, route_turn(user_text, history))
+
+
+def route_turn(user_text: str, history: str = "", priority: int = PRIORITY_ROUTE) -> dict:
+    """priority only matters for LLM routing; speculative callers pass PRIORITY_BACKGROUND."""
+    if ENABLE_LLM_TOOL_SELECTION:
+        return _llm_route(user_text, history, priority)
+    return _heuristic_route(user_text)
+
+
+def fetch_plan(user_text: str, route: dict) -> dict:
     tool = route["tool"]
     args = route.get("args", {}) or {}
 
     if tool == "weather":
-        raw = get_weather_raw(args.get("location", "Hyderabad"))
+        raw = tool_cache.get("weather", args.get("location") or WEATHER_DEFAULT_LOCATION)
+    elif tool == "news":
+        raw = tool_cache.get("news", args.get("topic") or "")
+    elif tool == "web_search":
+        raw = duckduckgo_search_raw(args.get("query", user_text))
+    else:
+        tool, raw = "llm_only", ""
+    return {"tool": tool, "args": args, "raw": raw}
+
+
+def _run_agent(user_text: str, history: str, plan: dict) -> dict:
+    tool = plan["tool"]
+    raw = plan["raw"]
+
+    if tool == "weather":
         prompt = f"Raw weather info:\n{raw}\n\nUser asked: {user_text}\nExplain clearly."
-        answer = ask_gemini(prompt).text
-        return {"tool_used": tool, "raw_data": raw, "answer": answer}
+        return _answer(tool, raw, ask_gemini(prompt, history=history))
 
     if tool == "news":
-        raw = get_news_raw(args.get("topic"))
         prompt = f"Raw news headlines:\n{raw}\n\nUser asked: {user_text}\nSummarize in bullet points, mention sources briefly."
-        answer = ask_gemini(prompt).text
-        return {"tool_used": tool, "raw_data": raw, "answer": answer}
+        return _answer(tool, raw, ask_gemini(prompt, history=history))
 
     if tool == "web_search":
-        raw = duckduckgo_search_raw(args.get("query", user_text))
         prompt = f"Web search results:\n{raw}\n\nUser asked: {user_text}\nAnswer using these results. If unsure, say so."
-        answer = ask_gemini(prompt).text
-        return {"tool_used": tool, "raw_data": raw, "answer": answer}
+        return _answer(tool, raw, ask_gemini(prompt, history=history))
 
-    answer = ask_gemini(user_text).text
-    return {"tool_used": "llm_only", "raw_data": "", "answer": answer}
+    return _answer("llm_only", "", ask_gemini(user_text, history=history))
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+# Lower number = served first. Routing and background work may be dropped.
+PRIORITY_ANSWER = 0
+PRIORITY_ROUTE = 1
+PRIORITY_BACKGROUND = 2
+
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "ConnectionError", "Timeout",
+}
+
+
+class Dropped(Exception):
+    """Request was shed before reaching the provider."""
+
+
+def is_retryable(e: Exception) -> bool:
+    msg = str(e)
+    return type(e).__name__ in RETRYABLE_ERRORS or "429" in msg or "503" in msg
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket where waiters are admitted in priority order.
+    A provider rate-limit response can pause the whole bucket via penalize().
+    """
+
+    def __init__(self, rate_per_s: float, capacity: int):
+        self.rate = rate_per_s
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def penalize(self, seconds: float):
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def acquire(self, priority: int, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and now >= self._blocked_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    if deadline is not None and now >= deadline:
+                        return False
+                    wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate, 0.01)
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+class LLMScheduler:
+    """
+    Central gate for provider calls: rate limiting, priority lanes,
+    de-duplication of identical in-flight prompts, and retry with backoff.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_s: float,
+        burst: int,
+        max_retries: int = 4,
+        base_backoff_s: float = 1.0,
+        max_wait_s: dict[int, float | None] | None = None,
+    ):
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_wait_s = max_wait_s or {PRIORITY_ANSWER: 30.0, PRIORITY_ROUTE: 2.0, PRIORITY_BACKGROUND: 10.0}
+
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._stats = {"submitted": 0, "deduped": 0, "dropped": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, inflight=len(self._inflight))
+
+    def submit(self, key: str, call: Callable[[], str], priority: int = PRIORITY_ANSWER) -> str:
+        """
+        Run call() under the rate limit and return its result.
+        Identical keys already in flight share one provider call.
+        Raises Dropped if shed, or the last provider error once retries are exhausted.
+        """
+        with self._lock:
+            self._stats["submitted"] += 1
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+            else:
+                self._stats["deduped"] += 1
+
+        if not owner:
+            return fut.result()
+
+        try:
+            fut.set_result(self._run(call, priority))
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return fut.result()
+
+    def _run(self, call: Callable[[], str], priority: int) -> str:
+        attempt = 0
+        while True:
+            if not self.bucket.acquire(priority, self.max_wait_s.get(priority)):
+                self._count("dropped")
+                raise Dropped(f"rate limiter queue wait exceeded (priority {priority})")
+            try:
+                return call()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+                attempt += 1
+                self._count("retries")
+                delay = self.base_backoff_s * (2 ** (attempt - 1)) * (0.5 + random.random())
+                if "429" in str(e) or type(e).__name__ in ("ResourceExhausted", "TooManyRequests"):
+                    self._count("rate_limited")
+                    # everyone backs off, not just this caller
+                    self.bucket.penalize(delay)
+                else:
+                    time.sleep(delay)
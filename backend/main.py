@@ -1,32 +1,59 @@
 
 import os
+import tempfile
 import uuid
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, jsonify, render_template, request
 from dotenv import load_dotenv
 
 from livekit.api.access_token import AccessToken, VideoGrants
 
-from stt import WhisperRoomSTT
-from llm import ask_gemini
+from stt import WhisperRoomSTT, settings_from_env
+from stt_coordinator import Coordinator
+from llm import ask_gemini, UNAVAILABLE_MESSAGE
+from transcribe_file import open_raw, open_wav, transcribe_file
 
 load_dotenv()
 
-app = Flask(__name__, static_folder="../frontend", static_url_path="")
+# same page as app.py; it shows the STT agent's transcripts when /api/start reports one
+app = Flask(__name__)
 
 LIVEKIT_URL = os.getenv("LIVEKIT_URL", "ws://localhost:7880")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", str(os.cpu_count() or 1)))
+
+# worker tuning (STT_MAX_LAG_MS, STT_END_SILENCE_MS, ...) is read by stt.settings_from_env(),
+# shared with stt_node.py so the single-worker and sharded modes behave the same
+STT_RETRY_AFTER_S = int(os.getenv("STT_RETRY_AFTER_S", "5"))  # Retry-After sent with a saturation 503
+
+# Sharded STT: rooms go to stt_node.py workers instead of an in-process worker
+STT_SHARDED = os.getenv("STT_SHARDED", "false").lower() == "true"
+STT_NODE_DEAD_AFTER_S = float(os.getenv("STT_NODE_DEAD_AFTER_S", "6"))
 
 # --- STT worker (joins room as "stt-agent" + transcribes) ---
-stt_worker = WhisperRoomSTT(
-    livekit_url=LIVEKIT_URL,
-    api_key=LIVEKIT_API_KEY,
-    api_secret=LIVEKIT_API_SECRET,
-    whisper_model=WHISPER_MODEL,
-)
-stt_worker.start_background()
+# Built by start_stt() from the __main__ block, not at import: /api/transcribe's
+# spawn pool re-imports this module in every child process.
+coordinator: Coordinator | None = None
+stt_worker: WhisperRoomSTT | None = None
+
+
+def start_stt():
+    global coordinator, stt_worker
+    if STT_SHARDED:
+        coordinator = Coordinator(dead_after_s=STT_NODE_DEAD_AFTER_S)
+        coordinator.start_background()
+        return
+    stt_worker = WhisperRoomSTT(
+        livekit_url=LIVEKIT_URL,
+        api_key=LIVEKIT_API_KEY,
+        api_secret=LIVEKIT_API_SECRET,
+        whisper_model=WHISPER_MODEL,
+        **settings_from_env(),
+    )
+    stt_worker.start_background()
+
 
 # --- store last Q/A ---
 last_answer = ""
@@ -35,12 +62,7 @@ last_question = ""
 
 @app.route("/")
 def serve_index():
-    return send_from_directory(app.static_folder, "index.html")
-
-
-@app.route("/style.css")
-def serve_css():
-    return send_from_directory(app.static_folder, "style.css")
+    return render_template("index.html")
 
 
 @app.route("/api/start", methods=["POST"])
@@ -48,8 +70,10 @@ def api_start():
     """
     Starts a new LiveKit room session:
     - Creates a new room name
-    - Returns {url, room, identity, token}
+    - Returns {url, room, identity, token, stt_agent}
     - Tells STT worker to join the same room and listen
+    - Returns 503 (with Retry-After) while the STT worker is saturated by the
+      running session, or if sharded and every STT node is full or saturated
     """
     global last_answer, last_question
     last_answer = ""
@@ -76,44 +100,123 @@ def api_start():
         .to_jwt()
     )
 
-    stt_worker.connect(room_name=room)
+    if coordinator:
+        # other sessions keep their rooms; each is released by its own /api/stop
+        if not coordinator.assign(room):
+            resp = jsonify({"error": "All STT nodes are full, try again shortly"})
+            return resp, 503, {"Retry-After": str(STT_RETRY_AFTER_S)}
+    else:
+        # the worker hosts one room; joining a new one would abandon the backlog of the running session
+        if stt_worker.debug_state().get("room") and stt_worker.is_saturated():
+            resp = jsonify({"error": "Speech recognition is overloaded, try again shortly"})
+            return resp, 503, {"Retry-After": str(STT_RETRY_AFTER_S)}
+        stt_worker.connect(room_name=room)
 
     return jsonify({
         "url": LIVEKIT_URL,
         "room": room,
         "identity": identity,
-        "token": token
+        "token": token,
+        "stt_agent": "stt-agent",  # participant that publishes on the 'transcript' data topic
     })
 
 
 @app.route("/api/stop", methods=["POST"])
 def api_stop():
-    stt_worker.disconnect()
+    """Body {room}: the room returned by /api/start. Only that room's STT is stopped."""
+    room = ((request.get_json(silent=True) or {}).get("room") or "").strip()
+    if coordinator:
+        if not room:
+            return jsonify({"error": "room is required"}), 400
+        coordinator.release(room)
+    elif not room or stt_worker.debug_state().get("room") == room:
+        # a stale tab stopping an old room must not disconnect the current one
+        stt_worker.disconnect()
     return jsonify({"ok": True})
 
 
 @app.route("/api/speech", methods=["GET"])
 def api_speech():
-    """Latest transcript produced by local whisper."""
+    """
+    Latest transcript produced by local whisper for ?room= (also pushed to the
+    room on the 'transcript' data topic).
+    """
+    room = (request.args.get("room") or "").strip()
+    if coordinator:
+        if not room:
+            return jsonify({"error": "room is required"}), 400
+        return jsonify({"text": coordinator.room_state(room).get("last_text", "")})
+    if room and stt_worker.debug_state().get("room") != room:
+        return jsonify({"text": ""})
     return jsonify({"text": stt_worker.last_text})
 
 
+@app.route("/api/nodes/heartbeat", methods=["POST"])
+def api_node_heartbeat():
+    """Called every few seconds by each stt_node.py worker."""
+    if not coordinator:
+        return jsonify({"error": "STT_SHARDED is not enabled"}), 404
+    data = request.get_json(silent=True) or {}
+    if not data.get("node_id") or not data.get("url"):
+        return jsonify({"error": "node_id and url are required"}), 400
+    coordinator.heartbeat(
+        data["node_id"], data["url"], int(data.get("capacity", 1)),
+        data.get("rooms") or [], bool(data.get("saturated")),
+    )
+    return jsonify({"ok": True})
+
+
+@app.route("/api/nodes", methods=["GET"])
+def api_nodes():
+    if not coordinator:
+        return jsonify({"error": "STT_SHARDED is not enabled"}), 404
+    return jsonify(coordinator.state())
+
+
+@app.route("/api/transcribe", methods=["POST"])
+def api_transcribe():
+    """
+    Offline transcription of an uploaded recording (multipart field 'file').
+    WAV is read from its header; .pcm/.raw uploads need form field sample_rate (and optionally channels).
+    """
+    upload = request.files.get("file")
+    if not upload:
+        return jsonify({"error": "file is required"}), 400
+
+    # stream to disk so the worker processes can memory-map it
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(upload.filename or "")[1])
+    os.close(fd)
+    try:
+        upload.save(path)
+        if path.endswith((".pcm", ".raw")):
+            src = open_raw(path, int(request.form.get("sample_rate", 16000)), int(request.form.get("channels", 1)))
+        else:
+            src = open_wav(path)
+        return jsonify(transcribe_file(src, model_name=WHISPER_MODEL, workers=TRANSCRIBE_WORKERS))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        os.remove(path)
+
+
 @app.route("/api/ask", methods=["POST"])
 def api_ask():
     """Send the user question to Gemini and return answer."""
     global last_answer, last_question
 
     data = request.get_json(silent=True) or {}
-    question = (data.get("question") or "").strip()
+    question = (data.get("question") or data.get("text") or "").strip()
 
     if not question:
         return jsonify({"error": "question is required"}), 400
 
     last_question = question
-    answer = ask_gemini(question)
-    last_answer = answer
+    res = ask_gemini(question)
+    last_answer = res.text
 
-    return jsonify({"answer": answer})
+    if not res.ok:
+        return jsonify({"error": UNAVAILABLE_MESSAGE, "answer": UNAVAILABLE_MESSAGE, "detail": res.error}), 503
+    return jsonify({"answer": res.text})
 
 
 @app.route("/api/answer", methods=["GET"])
@@ -126,11 +229,12 @@ def api_debug():
     return jsonify({
         "livekit_url": LIVEKIT_URL,
         "whisper_model": WHISPER_MODEL,
-        "stt": stt_worker.debug_state(),
+        "stt": coordinator.state() if coordinator else stt_worker.debug_state(),
         "gemini_model": os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
         "has_google_api_key": bool(os.getenv("GOOGLE_API_KEY")),
     })
 
 
 if __name__ == "__main__":
+    start_stt()
     app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+
+from backend.config import MEMORY_DB_PATH, MEMORY_TOKEN_BUDGET, MEMORY_COMPACT_MIN_TOKENS
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token is close enough for budgeting
+    return len(text or "") // 4 + 1
+
+
+class ConversationStore:
+    """
+    Per-session conversation history in SQLite.
+
+    build_context() walks turns newest-first and stops once the token budget
+    is spent, so the cost is O(budget) regardless of conversation length.
+    Turns that fall outside the budget are folded into a rolling per-session
+    summary by a background thread. Until that happens they stay in the
+    context verbatim, up to compact_min_tokens extra, so nothing drops out
+    between leaving the window and landing in the summary.
+    """
+
+    def __init__(self, path: str, *, token_budget: int = 1200, compact_min_tokens: int = 300):
+        self.path = path
+        self.token_budget = token_budget
+        self.compact_min_tokens = compact_min_tokens
+
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._compacting: set[str] = set()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    created REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS turns_session_id ON turns (session, id);
+                CREATE TABLE IF NOT EXISTS summaries (
+                    session TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    upto_id INTEGER NOT NULL
+                );
+            """)
+            self._db = db
+        return self._db
+
+    def add_turn(self, session: str, role: str, text: str) -> None:
+        text = (text or "").strip()
+        if not text:
+            return
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT INTO turns (session, role, text, tokens, created) VALUES (?, ?, ?, ?, ?)",
+                (session, role, text, estimate_tokens(text), time.time()),
+            )
+            db.commit()
+
+    def _summary(self, session: str) -> tuple[str, int]:
+        row = self._conn().execute(
+            "SELECT text, upto_id FROM summaries WHERE session = ?", (session,)
+        ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def build_context(self, session: str) -> str:
+        """Summary + not-yet-summarized overflow + the most recent turns that fit the budget, oldest first."""
+        with self._lock:
+            summary, upto_id = self._summary(session)
+            budget = self.token_budget - (estimate_tokens(summary) if summary else 0)
+
+            recent = []
+            overflow_id = None  # newest turn outside the budget window
+            overflow_tokens = 0
+            compact = False
+            cur = self._conn().execute(
+                "SELECT id, role, text, tokens FROM turns WHERE session = ? AND id > ? ORDER BY id DESC",
+                (session, upto_id),
+            )
+            for turn_id, role, text, tokens in cur:
+                if overflow_id is None and tokens <= budget:
+                    budget -= tokens
+                elif overflow_tokens + tokens <= self.compact_min_tokens:
+                    overflow_id = overflow_id or turn_id
+                    overflow_tokens += tokens
+                else:
+                    overflow_id = overflow_id or turn_id
+                    compact = True
+                    break
+                recent.append((role, text))
+            cur.close()
+
+        if compact:
+            # a worthwhile batch has built up outside the window: fold it into the summary
+            self._schedule_compaction(session, overflow_id)
+
+        if not summary and not recent:
+            return ""
+
+        lines = ["Conversation so far:"]
+        if summary:
+            lines.append(f"Summary of earlier turns: {summary}")
+        for role, text in reversed(recent):
+            lines.append(f"{'User' if role == 'user' else 'Assistant'}: {text}")
+        return "\n".join(lines)
+
+    def _schedule_compaction(self, session: str, upto_id: int) -> None:
+        with self._lock:
+            if session in self._compacting:
+                return
+            self._compacting.add(session)
+        threading.Thread(target=self._compact, args=(session, upto_id), daemon=True).start()
+
+    def _compact(self, session: str, upto_id: int) -> None:
+        from backend.llm import ask_gemini
+        from backend.llm_scheduler import PRIORITY_BACKGROUND
+
+        try:
+            with self._lock:
+                summary, prev_id = self._summary(session)
+                rows = self._conn().execute(
+                    "SELECT role, text, tokens FROM turns WHERE session = ? AND id > ? AND id <= ? ORDER BY id",
+                    (session, prev_id, upto_id),
+                ).fetchall()
+            if upto_id <= prev_id:
+                # a compaction that finished after this one was scheduled already covers these turns
+                return
+
+            transcript = "\n".join(f"{'User' if r[0] == 'user' else 'Assistant'}: {r[1]}" for r in rows)
+            prompt = (
+                f"Existing summary:\n{summary or '(none)'}\n\nNew conversation turns:\n{transcript}\n\n"
+                "Update the summary to cover everything above in under 120 words. "
+                "Keep names, places, dates and open questions. Return only the summary."
+            )
+            res = ask_gemini(prompt, priority=PRIORITY_BACKGROUND)
+            if not res.ok or res.error:
+                return
+
+            with self._lock:
+                db = self._conn()
+                db.execute(
+                    "INSERT INTO summaries (session, text, upto_id) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session) DO UPDATE SET text = excluded.text, upto_id = excluded.upto_id "
+                    "WHERE excluded.upto_id > summaries.upto_id",
+                    (session, res.text, upto_id),
+                )
+                db.commit()
+        finally:
+            with self._lock:
+                self._compacting.discard(session)
+
+
+conversation_store = ConversationStore(
+    MEMORY_DB_PATH,
+    token_budget=MEMORY_TOKEN_BUDGET,
+    compact_min_tokens=MEMORY_COMPACT_MIN_TOKENS,
+)
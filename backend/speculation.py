@@ -0,0 +1,153 @@
+from __future__ import annotations
+import difflib
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from backend.config import SPEC_STABLE_MS, SPEC_MIN_WORDS, SPEC_MATCH_RATIO
+from backend.llm_router import _heuristic_route, route_turn, fetch_plan
+from backend.llm_scheduler import PRIORITY_BACKGROUND
+from backend.memory import conversation_store
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9' ]+", " ", (text or "").lower()).split())
+
+
+def similar(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, _normalize(a), _normalize(b)).ratio()
+
+
+def _route_key(text: str) -> tuple:
+    """Tool + normalized args the heuristic router picks: 'weather in Delhi' vs 'in Dubai' differ here."""
+    route = _heuristic_route(text)
+    return route["tool"], tuple(sorted((k, _normalize(str(v))) for k, v in (route.get("args") or {}).items()))
+
+
+class Speculation:
+    def __init__(self, text: str, future: Future):
+        self.text = text
+        self.future = future
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self.cancelled = False
+
+
+class Speculator:
+    """
+    Starts routing + tool prefetch (route_turn + fetch_plan) on a partial
+    transcript once it has been stable for stable_ms, so the final question
+    only pays for the answer call. A partial that changes materially cancels
+    and restarts the speculation; a final transcript reuses it only if it is
+    close to the partial and routes to the same tool with the same args.
+
+    Speculative LLM routing runs at PRIORITY_BACKGROUND, so guesses are shed
+    before real requests. Stability is tracked by one timer thread for all
+    sessions; each partial just pushes its session's deadline back.
+    """
+
+    def __init__(self, *, stable_ms: int = 400, min_words: int = 3, match_ratio: float = 0.9, workers: int = 4):
+        self.stable_ms = stable_ms
+        self.min_words = min_words
+        self.match_ratio = match_ratio
+
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[str, float]] = {}  # session -> (partial text, stable deadline)
+        self._wake = threading.Condition(self._lock)
+        self._specs: dict[str, Speculation] = {}
+        self._timer: threading.Thread | None = None
+        self._stats = {"started": 0, "restarted": 0, "cancelled": 0, "hits": 0, "misses": 0, "saved_ms": 0}
+
+    def on_partial(self, session: str, text: str) -> None:
+        text = (text or "").strip()
+        if len(text.split()) < self.min_words:
+            return
+        with self._lock:
+            self._pending[session] = (text, time.monotonic() + self.stable_ms / 1000)
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._timer_loop, daemon=True)
+                self._timer.start()
+            self._wake.notify()
+
+    def _timer_loop(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                due = [s for s, (_, deadline) in self._pending.items() if deadline <= now]
+                if not due:
+                    nxt = min((d for _, d in self._pending.values()), default=None)
+                    self._wake.wait(None if nxt is None else nxt - now)
+                    continue
+                stable = [(s, self._pending.pop(s)[0]) for s in due]
+            for session, text in stable:
+                self._maybe_start(session, text)
+
+    def _maybe_start(self, session: str, text: str) -> None:
+        with self._lock:
+            current = self._specs.get(session)
+            if current and similar(current.text, text) >= self.match_ratio:
+                return
+            if current:
+                # superseded: stop it before the tool fetch if it has not got there yet
+                current.cancelled = True
+                self._stats["restarted"] += 1
+            self._stats["started"] += 1
+            spec = Speculation(text, Future())
+            self._specs[session] = spec
+        self._pool.submit(self._run, session, spec)
+
+    def _run(self, session: str, spec: Speculation) -> None:
+        try:
+            plan = None
+            if not spec.cancelled:
+                route = route_turn(spec.text, conversation_store.build_context(session), PRIORITY_BACKGROUND)
+                if not spec.cancelled:
+                    plan = fetch_plan(spec.text, route)
+                else:
+                    with self._lock:
+                        self._stats["cancelled"] += 1
+            spec.future.set_result(plan)
+        except Exception as e:
+            spec.future.set_exception(e)
+        spec.finished = time.monotonic()
+
+    def take(self, session: str, final_text: str) -> dict | None:
+        """Plan for final_text if a matching speculation exists, else None (caller plans normally)."""
+        with self._lock:
+            self._pending.pop(session, None)
+            spec = self._specs.pop(session, None)
+            if spec is None:
+                return None
+            if similar(spec.text, final_text) < self.match_ratio or _route_key(spec.text) != _route_key(final_text):
+                spec.cancelled = True
+                self._stats["misses"] += 1
+                return None
+
+        now = time.monotonic()
+        saved_ms = ((spec.finished or now) - spec.started) * 1000
+        try:
+            plan = spec.future.result()
+        except Exception:
+            plan = None
+        if plan is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["saved_ms"] += int(saved_ms)
+        return plan
+
+    def stats(self) -> dict:
+        with self._lock:
+            taken = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                hit_rate=round(self._stats["hits"] / taken, 3) if taken else 0.0,
+                avg_saved_ms=int(self._stats["saved_ms"] / self._stats["hits"]) if self._stats["hits"] else 0,
+            )
+
+
+speculator = Speculator(stable_ms=SPEC_STABLE_MS, min_words=SPEC_MIN_WORDS, match_ratio=SPEC_MATCH_RATIO)
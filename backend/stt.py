@@ -1,13 +1,115 @@
 #stt.py
 import asyncio
+import json
+import os
+import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import numpy as np
 import whisper
 
 from livekit import rtc
 from livekit.api.access_token import AccessToken, VideoGrants
 
+from endpointing import Endpointer, FixedEndpointer
+from whisper_thresholds import NO_SPEECH_PROB, LOGPROB_FLOOR, COMPRESSION_RATIO_MAX
+
+# Below these, a low-confidence or blocklisted transcript is treated as real speech
+SUSPECT_NO_SPEECH_PROB = 0.3
+LOW_ENERGY_RMS = 600  # whole-utterance RMS (int16), trailing silence included
+
+# Phrases Whisper tends to invent on near-silent audio; only rejected when the audio looks suspect
+PHANTOM_PHRASES = {
+    "thank you", "thank you very much", "thanks for watching", "thank you for watching",
+    "please subscribe", "subscribe", "bye", "you", "okay", "so", "uh", "um",
+}
+
+DUPLICATE_WINDOW_S = 10
+
+# LiveKit data topic for transcript events
+TRANSCRIPT_TOPIC = "transcript"
+
+
+def settings_from_env() -> dict:
+    """WhisperRoomSTT tuning kwargs from STT_* env vars; used by main.py and stt_node.py alike."""
+    return {
+        # load shedding
+        "max_lag_ms": int(os.getenv("STT_MAX_LAG_MS", "1500")),
+        "max_pending_utterances": int(os.getenv("STT_MAX_PENDING_UTTERANCES", "3")),
+        "reject_lag_ms": int(os.getenv("STT_REJECT_LAG_MS", "5000")),
+        # LLM calls one accepted transcript triggers (for the llm_calls_avoided counter)
+        "llm_calls_per_turn": int(os.getenv("STT_LLM_CALLS_PER_TURN", "1")),
+        # end-of-turn detection
+        "end_silence_ms": int(os.getenv("STT_END_SILENCE_MS", "900")),
+        "adaptive_endpointing": os.getenv("STT_ADAPTIVE_ENDPOINTING", "true").lower() == "true",
+        # quick partial transcript for endpointing, also the only source of "partial" transcript
+        # events; 0 = off (evaluate with endpointing.py + recorded partials first)
+        "partial_after_ms": int(os.getenv("STT_PARTIAL_AFTER_MS", "0")),
+        # transcript events over the LiveKit data channel
+        "publish_transcripts": os.getenv("STT_PUBLISH_TRANSCRIPTS", "true").lower() == "true",
+    }
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9' ]+", "", (text or "").lower()).strip()
+
+
+def _is_repetitive(text: str) -> bool:
+    """Same word or short phrase looped, e.g. 'the the the the' or 'okay okay okay'."""
+    words = _normalize(text).split()
+    if len(words) < 4:
+        return False
+    for n in (1, 2, 3):
+        grams = [" ".join(words[i:i + n]) for i in range(0, len(words) - n + 1, n)]
+        if len(grams) >= 3 and len(set(grams)) == 1:
+            return True
+    return len(set(words)) / len(words) < 0.3
+
+
+def filter_transcript(result: dict, *, low_energy: bool = False) -> tuple[str, str | None]:
+    """
+    Post-transcription filter for a whisper.transcribe() result.
+    Drops hallucinated segments and returns (text, reject_reason).
+    reject_reason is None when the text should be used.
+
+    The logprob floor and the phantom-phrase blocklist only apply when the
+    audio is suspect (elevated no_speech_prob or low_energy), so a clear
+    "Thank you." or a mumbled but real question still gets through.
+    """
+    kept = []
+    reason = "empty"
+    suspect = low_energy
+    for seg in result.get("segments") or []:
+        no_speech = seg.get("no_speech_prob", 0.0)
+        logprob = seg.get("avg_logprob", 0.0)
+        seg_suspect = low_energy or no_speech > SUSPECT_NO_SPEECH_PROB
+        if no_speech > NO_SPEECH_PROB and logprob < LOGPROB_FLOOR:
+            reason = "no_speech"
+            continue
+        if seg.get("compression_ratio", 0.0) > COMPRESSION_RATIO_MAX:
+            reason = "compression_ratio"
+            continue
+        if seg_suspect and logprob < LOGPROB_FLOOR:
+            reason = "low_logprob"
+            continue
+        suspect = suspect or seg_suspect
+        kept.append((seg.get("text") or "").strip())
+
+    if not result.get("segments"):
+        kept = [(result.get("text") or "").strip()]
+
+    text = " ".join(t for t in kept if t).strip()
+    if not text:
+        return "", reason
+    if suspect and _normalize(text) in PHANTOM_PHRASES:
+        return text, "blocklist"
+    if _is_repetitive(text):
+        return text, "repetition"
+    return text, None
+
 
 class WhisperRoomSTT:
     """
@@ -15,7 +117,24 @@ class WhisperRoomSTT:
     buffers speech segments, runs local Whisper, and stores last_text.
     """
 
-    def __init__(self, livekit_url: str, api_key: str, api_secret: str, whisper_model: str = "base"):
+    def __init__(
+        self,
+        livekit_url: str,
+        api_key: str,
+        api_secret: str,
+        whisper_model: str = "base",
+        *,
+        max_lag_ms: int = 1500,
+        max_pending_utterances: int = 3,
+        reject_lag_ms: int = 5000,
+        llm_calls_per_turn: int = 1,
+        end_silence_ms: int = 900,
+        adaptive_endpointing: bool = True,
+        partial_after_ms: int = 0,
+        publish_transcripts: bool = True,
+        model=None,
+        model_executor: ThreadPoolExecutor | None = None,
+    ):
         self.livekit_url = livekit_url
         self.api_key = api_key
         self.api_secret = api_secret
@@ -35,8 +154,43 @@ class WhisperRoomSTT:
         self._last_event = ""
         self._last_error = ""
 
+        # backpressure / load shedding
+        self.max_lag_ms = max_lag_ms
+        self.max_pending_utterances = max_pending_utterances
+        self.reject_lag_ms = reject_lag_ms
+        self._utter_q: asyncio.Queue | None = None
+        self._transcriber: asyncio.Task | None = None
+        self._lag_ms = 0
+        self._lag_at = 0.0
+        self._max_lag_ms_seen = 0
+        self._shed_silence_frames = 0
+        self._shed_utterances = 0
+
+        # transcript filter
+        self.llm_calls_per_turn = llm_calls_per_turn
+        self._last_accepted_at = 0.0
+        self._rejected_transcripts: dict[str, int] = {}
+        self._last_rejected = ""
+
+        # end-of-turn detection
+        self.end_silence_ms = end_silence_ms
+        self.adaptive_endpointing = adaptive_endpointing
+        self.partial_after_ms = partial_after_ms
+        self._last_endpoint_ms = 0
+        self._partials_reused = 0
+        self._partials_dropped = 0
+
+        # transcript events over the LiveKit data channel
+        self.publish_transcripts = publish_transcripts
+        self._seq = 0
+        self._published = {"final": 0, "partial": 0}
+
+        # one thread owns the model: partials and finals never run concurrently.
+        # Workers sharing a model (see stt_node.py) must share this executor too.
+        self._model_executor = model_executor or ThreadPoolExecutor(max_workers=1)
+
         # Load whisper once
-        self._model = whisper.load_model(self.whisper_model_name)
+        self._model = model or whisper.load_model(self.whisper_model_name)
 
         self._stop_flag = asyncio.Event()
 
@@ -59,191 +213,55 @@ class WhisperRoomSTT:
                     await self._connect_room(cmd["room"])
                 elif cmd["type"] == "disconnect":
                     await self._disconnect_room()
+                    if cmd.get("reset"):
+                        self._reset_state()
             except Exception as e:
                 self._last_error = f"{type(e).__name__}: {e}"
 
     def connect(self, room_name: str):
+        """
+        Queue a room join, replacing the current room. Admission is the
+        caller's job: check is_saturated() first (main.py /api/start answers
+        503 + Retry-After while the running session is saturated).
+        """
         if not self._loop:
             return
         asyncio.run_coroutine_threadsafe(self._cmd_q.put({"type": "connect", "room": room_name}), self._loop)
 
-    def disconnect(self):
+    def disconnect(self, reset: bool = False):
+        """reset=True also clears transcripts and counters, for a worker that will host another session."""
         if not self._loop:
             return
-        asyncio.run_coroutine_threadsafe(self._cmd_q.put({"type": "disconnect"}), self._loop)
-
-    def debug_state(self):
-        return {
-            "room": self._room_name,
-            "connected": self._connected,
-            "tracks_subscribed": self._tracks,
-            "audio_frames": self._frames,
-            "last_text": self.last_text,
-            "last_event": self._last_event,
-            "last_error": self._last_error,
-        }
-
-    def _agent_token(self, room_name: str) -> str:
-        return (
-            AccessToken(self.api_key, self.api_secret)
-            .with_identity("stt-agent")
-            .with_grants(
-                VideoGrants(
-                    room_join=True,
-                    room=room_name,
-                    can_publish=False,
-                    can_subscribe=True,
-                    can_publish_data=False,
-                )
-            )
-            .to_jwt()
-        )
+        asyncio.run_coroutine_threadsafe(self._cmd_q.put({"type": "disconnect", "reset": reset}), self._loop)
 
-    async def _disconnect_room(self):
-        self._last_event = "disconnecting"
-        self._stop_flag.set()
-
-        if self._room:
-            try:
-                await self._room.disconnect()
-            except Exception:
-                pass
-
-        self._room = None
-        self._room_name = None
-        self._connected = False
-        self._tracks = 0
-        self._frames = 0
-        self._last_event = "disconnected"
-        self._stop_flag = asyncio.Event()
-
-    async def _connect_room(self, room_name: str):
-        await self._disconnect_room()
-
-        self._room_name = room_name
-        self._last_event = f"connecting:{room_name}"
+    def _reset_state(self):
+        self.last_text = ""
+        self._last_accepted_at = 0.0
+        self._rejected_transcripts = {}
+        self._last_rejected = ""
+        self._max_lag_ms_seen = 0
+        self._shed_silence_frames = 0
+        self._shed_utterances = 0
+        self._last_endpoint_ms = 0
+        self._partials_reused = 0
+        self._partials_dropped = 0
+        self._seq = 0
+        self._published = {"final": 0, "partial": 0}
         self._last_error = ""
 
-        token = self._agent_token(room_name)
-        room = rtc.Room()
-        self._room = room
-
-        @room.on("connection_state_changed")
-        def _on_state_changed(state: rtc.ConnectionState):
-            self._last_event = f"state:{state}"
-            self._connected = (state == rtc.ConnectionState.CONN_CONNECTED)
-
-        @room.on("track_subscribed")
-        def _on_track_subscribed(track: rtc.Track, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
-            if publication.kind == rtc.TrackKind.KIND_AUDIO:
-                self._tracks += 1
-                self._last_event = f"audio_subscribed:{participant.identity}"
-                asyncio.create_task(self._consume_audio(track))
-
-        await room.connect(self.livekit_url, token)
-        self._last_event = "connected_waiting_audio"
-
-    async def _consume_audio(self, track: rtc.Track):
-        """
-        Silence-based segmentation → Whisper transcription.
-        """
-        # Try to request 16k mono frames (preferred)
-        try:
-            stream = rtc.AudioStream(track, sample_rate=16000, num_channels=1)
-        except TypeError:
-            stream = rtc.AudioStream(track)
-
-        # segmentation controls
-        RMS_THRESHOLD = 500
-        END_SILENCE_MS = 900
-        MIN_AUDIO_MS = 700
-
-        in_speech = False
-        silence_ms = 0
-        audio_ms = 0
-        chunks = []
-
-        async for ev in stream:
-            if self._stop_flag.is_set():
-                break
-
-            frame = ev.frame
-            self._frames += 1
-
-            pcm = np.frombuffer(frame.data, dtype=np.int16)
-
-            if getattr(frame, "num_channels", 1) > 1:
-                pcm = pcm.reshape(-1, frame.num_channels).mean(axis=1).astype(np.int16)
-
-            rms = int(np.sqrt(np.mean(pcm.astype(np.float32) ** 2)))
-            frame_ms = int(1000 * (frame.samples_per_channel / frame.sample_rate))
-
-            if rms > RMS_THRESHOLD:
-                in_speech = True
-                silence_ms = 0
-                chunks.append(pcm)
-                audio_ms += frame_ms
-            else:
-                if in_speech:
-                    chunks.append(pcm)
-                    silence_ms += frame_ms
-                    audio_ms += frame_ms
-
-            if in_speech and silence_ms >= END_SILENCE_MS:
-                # finalize utterance
-                in_speech = False
-                silence_ms = 0
+    def _set_lag(self, lag_ms: int):
+        self._lag_ms = lag_ms
+        self._lag_at = time.monotonic()
 
-                if audio_ms >= MIN_AUDIO_MS and chunks:
-                    await self._transcribe_chunks(chunks, frame.sample_rate)
-
-                chunks = []
-                audio_ms = 0
-
-        # flush
-        if chunks and audio_ms >= MIN_AUDIO_MS:
-            await self._transcribe_chunks(chunks, 16000)
-
-    async def _transcribe_chunks(self, chunks, sample_rate: int):
-        try:
-            audio_i16 = np.concatenate(chunks)
-            audio_f32 = audio_i16.astype(np.float32) / 32768.0
-
-            if sample_rate != 16000:
-                # We rely on AudioStream(sample_rate=16000). If not, show diagnostic.
-                self._last_error = f"Audio sample_rate={sample_rate} (expected 16000)."
-                return
+    def current_lag_ms(self) -> int:
+        """Last measured lag, decayed by wall-clock time since, so a stalled stream doesn't pin it."""
+        if not self._lag_ms:
+            return 0
+        return max(0, int(self._lag_ms - (time.monotonic() - self._lag_at) * 1000))
 
-            result = self._model.transcribe(audio_f32, fp16=False, language="en")
-            text = (result.get("text") or "").strip()
-
-            if text:
-                self.last_text = text
-                self._last_event = f"transcribed:{text[:40]}"
-        except Exception as e:
-            self._last_error = f"{type(e).__name__}: {e}"
-        self._loop.run_until_complete(self._main())
-
-    async def _main(self):
-        while True:
-            cmd = await self._cmd_q.get()
-            try:
-                if cmd["type"] == "connect":
-                    await self._connect_room(cmd["room"])
-                elif cmd["type"] == "disconnect":
-                    await self._disconnect_room()
-            except Exception as e:
-                self._last_error = f"{type(e).__name__}: {e}"
-
-    def connect(self, room_name: str):
-        if not self._loop:
-            return
-        asyncio.run_coroutine_threadsafe(self._cmd_q.put({"type": "connect", "room": room_name}), self._loop)
-
-    def disconnect(self):
-        if not self._loop:
-            return
-        asyncio.run_coroutine_threadsafe(self._cmd_q.put({"type": "disconnect"}), self._loop)
+    def is_saturated(self) -> bool:
+        pending = self._utter_q.qsize() if self._utter_q else 0
+        return self.current_lag_ms() >= self.reject_lag_ms or pending >= self.max_pending_utterances
 
     def debug_state(self):
         return {
@@ -254,6 +272,22 @@ class WhisperRoomSTT:
             "last_text": self.last_text,
             "last_event": self._last_event,
             "last_error": self._last_error,
+            "lag_ms": self.current_lag_ms(),
+            "max_lag_ms": self._max_lag_ms_seen,
+            "pending_utterances": self._utter_q.qsize() if self._utter_q else 0,
+            "shed_silence_frames": self._shed_silence_frames,
+            "shed_utterances": self._shed_utterances,
+            "saturated": self.is_saturated(),
+            "rejected_transcripts": dict(self._rejected_transcripts),
+            "last_rejected": self._last_rejected,
+            # duplicates never reached the client as new text, so they saved nothing
+            "llm_calls_avoided": sum(
+                n for reason, n in self._rejected_transcripts.items() if reason != "duplicate"
+            ) * self.llm_calls_per_turn,
+            "last_endpoint_silence_ms": self._last_endpoint_ms,
+            "partials_reused": self._partials_reused,
+            "partials_dropped": self._partials_dropped,
+            "published": dict(self._published),
         }
 
     def _agent_token(self, room_name: str) -> str:
@@ -266,7 +300,7 @@ class WhisperRoomSTT:
                     room=room_name,
                     can_publish=False,
                     can_subscribe=True,
-                    can_publish_data=False,
+                    can_publish_data=self.publish_transcripts,
                 )
             )
             .to_jwt()
@@ -276,6 +310,9 @@ class WhisperRoomSTT:
         self._last_event = "disconnecting"
         self._stop_flag.set()
 
+        if self._transcriber:
+            self._transcriber.cancel()
+
         if self._room:
             try:
                 await self._room.disconnect()
@@ -287,6 +324,9 @@ class WhisperRoomSTT:
         self._connected = False
         self._tracks = 0
         self._frames = 0
+        self._transcriber = None
+        self._utter_q = None
+        self._set_lag(0)
         self._last_event = "disconnected"
         self._stop_flag = asyncio.Event()
 
@@ -301,6 +341,9 @@ class WhisperRoomSTT:
         room = rtc.Room()
         self._room = room
 
+        self._utter_q = asyncio.Queue(maxsize=self.max_pending_utterances)
+        self._transcriber = asyncio.create_task(self._transcribe_worker(self._utter_q))
+
         @room.on("connection_state_changed")
         def _on_state_changed(state: rtc.ConnectionState):
             self._last_event = f"state:{state}"
@@ -318,7 +361,20 @@ class WhisperRoomSTT:
 
     async def _consume_audio(self, track: rtc.Track):
         """
-        Silence-based segmentation → Whisper transcription.
+        Silence-based segmentation → utterance queue → Whisper transcription.
+
+        Lag is wall-clock time elapsed minus audio time consumed. While lag is
+        above max_lag_ms, silence inside an utterance is shed (it still counts
+        toward end-of-utterance), and the utterance queue drops its oldest
+        entry when full.
+
+        End of turn is decided by an Endpointer: the required trailing silence
+        adapts to the energy contour and, if partial_after_ms is set, to a
+        quick partial transcript taken once that much silence has passed. If
+        speech does not resume, that partial is reused as the final transcript.
+        A Whisper run cannot be interrupted once the executor has it, so at most
+        one partial is in flight per stream and a superseded one is left to
+        finish and its result dropped.
         """
         # Try to request 16k mono frames (preferred)
         try:
@@ -328,7 +384,6 @@ class WhisperRoomSTT:
 
         # segmentation controls
         RMS_THRESHOLD = 500
-        END_SILENCE_MS = 900
         MIN_AUDIO_MS = 700
 
         in_speech = False
@@ -336,6 +391,19 @@ class WhisperRoomSTT:
         audio_ms = 0
         chunks = []
 
+        if self.adaptive_endpointing:
+            endpointer = Endpointer(base_silence_ms=self.end_silence_ms)
+        else:
+            endpointer = FixedEndpointer(base_silence_ms=self.end_silence_ms)
+        partial_task: asyncio.Task | None = None
+        partial_stale = False  # the running partial no longer covers the utterance
+        partial_result: dict | None = None
+
+        # lag tracking: t0 is the estimated wall-clock time of media position 0
+        t0 = None
+        media_ms = 0.0
+        idle_since = time.monotonic()
+
         async for ev in stream:
             if self._stop_flag.is_set():
                 break
@@ -343,6 +411,18 @@ class WhisperRoomSTT:
             frame = ev.frame
             self._frames += 1
 
+            now = time.monotonic()
+            frame_dur_ms = 1000 * frame.samples_per_channel / frame.sample_rate
+            waited_ms = (now - idle_since) * 1000
+            # If we had to wait for this frame we are caught up: re-anchor (also covers mutes/pauses).
+            if t0 is None or waited_ms >= frame_dur_ms / 2:
+                t0 = now - media_ms / 1000
+            t0 = min(t0, now - media_ms / 1000)
+            self._set_lag(int((now - t0) * 1000 - media_ms))
+            self._max_lag_ms_seen = max(self._max_lag_ms_seen, self._lag_ms)
+            media_ms += frame_dur_ms
+            lagging = self._lag_ms > self.max_lag_ms
+
             pcm = np.frombuffer(frame.data, dtype=np.int16)
 
             if getattr(frame, "num_channels", 1) > 1:
@@ -356,42 +436,144 @@ class WhisperRoomSTT:
                 silence_ms = 0
                 chunks.append(pcm)
                 audio_ms += frame_ms
+                endpointer.observe_speech(rms, frame_ms)
+                if partial_task:
+                    # speaker carried on
+                    partial_stale = True
+                partial_result = None
             else:
                 if in_speech:
-                    chunks.append(pcm)
+                    if lagging:
+                        self._shed_silence_frames += 1
+                    else:
+                        chunks.append(pcm)
                     silence_ms += frame_ms
                     audio_ms += frame_ms
 
-            if in_speech and silence_ms >= END_SILENCE_MS:
+            if in_speech and self.adaptive_endpointing and self.partial_after_ms and not lagging \
+                    and partial_task is None and partial_result is None \
+                    and silence_ms >= self.partial_after_ms and audio_ms >= MIN_AUDIO_MS:
+                partial_task = asyncio.create_task(self._run_model(np.concatenate(chunks)))
+                partial_stale = False
+
+            if partial_task and partial_task.done():
+                if partial_stale:
+                    self._partials_dropped += 1
+                elif not partial_task.cancelled() and partial_task.exception() is None:
+                    partial_result = partial_task.result()
+                    endpointer.partial_text = (partial_result.get("text") or "").strip()
+                    partial_text, reason = filter_transcript(partial_result)
+                    if reason is None:
+                        # lossy and off the ingest path; the final that follows is reliable
+                        asyncio.create_task(self._publish("partial", partial_text))
+                partial_task = None
+
+            if in_speech and silence_ms >= endpointer.silence_needed_ms():
                 # finalize utterance
                 in_speech = False
+                self._last_endpoint_ms = silence_ms
                 silence_ms = 0
 
                 if audio_ms >= MIN_AUDIO_MS and chunks:
-                    await self._transcribe_chunks(chunks, frame.sample_rate)
+                    if partial_result is not None:
+                        self._partials_reused += 1
+                    self._enqueue_utterance(chunks, frame.sample_rate, partial_result)
 
                 chunks = []
                 audio_ms = 0
+                endpointer.reset()
+                if partial_task:
+                    partial_stale = True
+                partial_result = None
+
+            idle_since = time.monotonic()
+
+        if partial_task:
+            partial_task.cancel()
+        # stream ended or stopped: nothing is buffered behind us any more
+        self._set_lag(0)
 
         # flush
         if chunks and audio_ms >= MIN_AUDIO_MS:
-            await self._transcribe_chunks(chunks, 16000)
+            self._enqueue_utterance(chunks, 16000, partial_result)
 
-    async def _transcribe_chunks(self, chunks, sample_rate: int):
-        try:
-            audio_i16 = np.concatenate(chunks)
-            audio_f32 = audio_i16.astype(np.float32) / 32768.0
+    def _enqueue_utterance(self, chunks, sample_rate: int, result: dict | None = None):
+        q = self._utter_q
+        if q is None:
+            return
+        if q.full():
+            # newest speech matters most: drop the oldest pending utterance
+            q.get_nowait()
+            self._shed_utterances += 1
+        q.put_nowait((chunks, sample_rate, result))
+
+    async def _transcribe_worker(self, q: asyncio.Queue):
+        while True:
+            chunks, sample_rate, result = await q.get()
+            await self._transcribe_chunks(chunks, sample_rate, result)
+
+    async def _run_model(self, audio_i16: np.ndarray) -> dict:
+        # run off the event loop so frame ingestion keeps up while Whisper works
+        audio_f32 = audio_i16.astype(np.float32) / 32768.0
+        return await asyncio.get_running_loop().run_in_executor(
+            self._model_executor,
+            partial(self._model.transcribe, audio_f32, fp16=False, language="en"),
+        )
 
+    async def _transcribe_chunks(self, chunks, sample_rate: int, result: dict | None = None):
+        try:
             if sample_rate != 16000:
                 # We rely on AudioStream(sample_rate=16000). If not, show diagnostic.
                 self._last_error = f"Audio sample_rate={sample_rate} (expected 16000)."
                 return
 
-            result = self._model.transcribe(audio_f32, fp16=False, language="en")
-            text = (result.get("text") or "").strip()
+            audio = np.concatenate(chunks)
+            if result is None:
+                result = await self._run_model(audio)
+            rms = float(np.sqrt(np.mean(audio.astype(np.float32) ** 2)))
+            text, reason = filter_transcript(result, low_energy=rms < LOW_ENERGY_RMS)
+
+            now = time.monotonic()
+            if reason is None and _normalize(text) == _normalize(self.last_text) \
+                    and now - self._last_accepted_at < DUPLICATE_WINDOW_S:
+                reason = "duplicate"
+
+            if reason:
+                # never surface it: last_text is what the client routes to the LLM
+                if reason != "empty":
+                    self._rejected_transcripts[reason] = self._rejected_transcripts.get(reason, 0) + 1
+                    self._last_rejected = text
+                    self._last_event = f"rejected:{reason}"
+                return
+
+            self.last_text = text
+            self._last_accepted_at = now
+            self._last_event = f"transcribed:{text[:40]}"
 
-            if text:
-                self.last_text = text
-                self._last_event = f"transcribed:{text[:40]}"
+            await self._publish("final", text)
         except Exception as e:
             self._last_error = f"{type(e).__name__}: {e}"
+
+    async def _publish(self, kind: str, text: str):
+        """
+        Send a transcript event to everyone in the room.
+        Frame: compact JSON {"k": "f"|"p", "n": seq, "t": text, "ts": epoch_ms}.
+        Finals are reliable; partials go lossy since the final follows anyway.
+
+        Partials are the endpointing probe's quick transcript (one per pause
+        in speech), so they only appear when partial_after_ms is enabled;
+        with the default of 0 the room only gets finals.
+        """
+        room = self._room
+        if not (self.publish_transcripts and room and self._connected):
+            return
+        self._seq += 1
+        payload = json.dumps(
+            {"k": kind[0], "n": self._seq, "t": text, "ts": int(time.time() * 1000)},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        try:
+            await room.local_participant.publish_data(payload, reliable=(kind == "final"), topic=TRANSCRIPT_TOPIC)
+            self._published[kind] += 1
+        except Exception as e:
+            self._last_error = f"publish_data: {type(e).__name__}: {e}"
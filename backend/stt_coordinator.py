@@ -0,0 +1,251 @@
+"""
+Assigns LiveKit rooms to STT worker nodes (stt_node.py).
+
+Nodes are placed on a consistent-hash ring with virtual nodes proportional
+to their capacity. A room goes to the first live node clockwise from its
+hash that still has a free slot, so assignments stay stable as nodes come
+and go. Nodes heartbeat in; a node that misses heartbeats for dead_after_s
+is dropped and its rooms are re-assigned to the survivors. Rooms no survivor
+has space for wait in a pending set and are retried on every heartbeat and
+reap pass until a node frees up or joins.
+
+Assignments are sticky: a node joining the ring only receives new rooms,
+live sessions are never moved off a healthy node.
+"""
+from __future__ import annotations
+import bisect
+import hashlib
+import threading
+import time
+
+import requests
+
+VNODES_PER_SLOT = 32
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class Node:
+    def __init__(self, node_id: str, url: str, capacity: int):
+        self.node_id = node_id
+        self.url = url.rstrip("/")
+        self.capacity = capacity
+        self.rooms: set[str] = set()
+        self.saturated = False
+        self.last_seen = time.monotonic()
+
+    def has_room_for_one_more(self, assigned: int) -> bool:
+        return not self.saturated and assigned < self.capacity
+
+
+class Coordinator:
+    def __init__(self, *, dead_after_s: float = 6.0, request_timeout_s: float = 5.0):
+        self.dead_after_s = dead_after_s
+        self.request_timeout_s = request_timeout_s
+
+        self._lock = threading.Lock()
+        self._nodes: dict[str, Node] = {}
+        self._ring: list[tuple[int, str]] = []
+        self._assignments: dict[str, str] = {}  # room -> node_id
+        self._pending: set[str] = set()  # orphaned rooms waiting for a free slot
+        self._thread: threading.Thread | None = None
+        self._stats = {"assigned": 0, "rejected": 0, "reassigned": 0, "nodes_lost": 0}
+
+    # --- membership ---
+
+    def _rebuild_ring(self):
+        self._ring = sorted(
+            (_hash(f"{n.node_id}#{i}"), n.node_id)
+            for n in self._nodes.values()
+            for i in range(max(1, n.capacity) * VNODES_PER_SLOT)
+        )
+
+    def heartbeat(self, node_id: str, url: str, capacity: int, rooms: list[str], saturated: bool = False):
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None or node.capacity != capacity or node.url != url.rstrip("/"):
+                node = Node(node_id, url, capacity)
+                self._nodes[node_id] = node
+                self._rebuild_ring()
+            node.last_seen = time.monotonic()
+            node.rooms = set(rooms)
+            node.saturated = saturated
+            # a pending room the node is still hosting (it was reaped and came back): take it back
+            load = sum(1 for n in self._assignments.values() if n == node_id)
+            for room in sorted(node.rooms & self._pending):
+                if load < capacity:
+                    self._assignments[room] = node_id
+                    self._pending.discard(room)
+                    load += 1
+            # rooms we placed here that the node no longer reports (e.g. it restarted)
+            missing = [r for r, n in self._assignments.items() if n == node_id and r not in node.rooms]
+            # rooms it still hosts that are assigned elsewhere or released (e.g. it was reaped and came back)
+            stray = [r for r in node.rooms if self._assignments.get(r) != node_id]
+            node.rooms -= set(stray)
+        for room in missing:
+            self._send(node_id, room)
+        for room in stray:
+            self._delete(node_id, room)
+        self._retry_pending()
+
+    def start_background(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._reap_loop, daemon=True)
+        self._thread.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.dead_after_s / 3)
+            self.reap()
+
+    def reap(self) -> list[str]:
+        """Drop nodes that stopped heartbeating and re-assign their rooms. Returns the moved rooms."""
+        now = time.monotonic()
+        with self._lock:
+            dead = [nid for nid, n in self._nodes.items() if now - n.last_seen > self.dead_after_s]
+            for nid in dead:
+                del self._nodes[nid]
+                self._stats["nodes_lost"] += 1
+            if dead:
+                self._rebuild_ring()
+            orphans = [r for r, nid in self._assignments.items() if nid in dead]
+            for room in orphans:
+                del self._assignments[room]
+
+        moved = []
+        for room in orphans:
+            if self._place(room):
+                moved.append(room)
+            else:
+                with self._lock:
+                    self._pending.add(room)
+        with self._lock:
+            self._stats["reassigned"] += len(moved)
+        return moved + self._retry_pending()
+
+    def _retry_pending(self) -> list[str]:
+        """Place rooms orphaned while every survivor was full. Returns the rooms placed."""
+        with self._lock:
+            pending = sorted(self._pending)
+        placed = []
+        for room in pending:
+            with self._lock:
+                if room not in self._pending:
+                    continue  # released or taken back meanwhile
+            if not self._place(room):
+                break  # still no space anywhere
+            with self._lock:
+                released = room not in self._pending
+                self._pending.discard(room)
+                if not released:
+                    self._stats["reassigned"] += 1
+            if released:
+                # the session ended while we were placing it
+                self.release(room)
+                continue
+            placed.append(room)
+        return placed
+
+    # --- placement ---
+
+    def _pick(self, room: str, exclude: set[str]) -> str | None:
+        if not self._ring:
+            return None
+        load: dict[str, int] = {}
+        for nid in self._assignments.values():
+            load[nid] = load.get(nid, 0) + 1
+        start = bisect.bisect(self._ring, (_hash(room), ""))
+        seen = set()
+        for i in range(len(self._ring)):
+            nid = self._ring[(start + i) % len(self._ring)][1]
+            if nid in seen or nid in exclude:
+                continue
+            seen.add(nid)
+            if self._nodes[nid].has_room_for_one_more(load.get(nid, 0)):
+                return nid
+            if len(seen) == len(self._nodes):
+                break
+        return None
+
+    def _send(self, node_id: str, room: str) -> bool:
+        with self._lock:
+            node = self._nodes.get(node_id)
+        if node is None:
+            return False
+        try:
+            r = requests.post(f"{node.url}/rooms", json={"room": room}, timeout=self.request_timeout_s)
+            return r.ok
+        except requests.RequestException:
+            return False
+
+    def assign(self, room: str) -> str | None:
+        """Place room on a node and tell the node to join. Returns node_id, or None if every node is full."""
+        node_id = self._place(room)
+        with self._lock:
+            self._stats["assigned" if node_id else "rejected"] += 1
+        return node_id
+
+    def _place(self, room: str) -> str | None:
+        tried: set[str] = set()
+        while True:
+            with self._lock:
+                node_id = self._pick(room, tried)
+                if node_id is None:
+                    return None
+                self._assignments[room] = node_id
+            if self._send(node_id, room):
+                return node_id
+            # node refused (saturated) or is unreachable: try the next one on the ring
+            tried.add(node_id)
+            with self._lock:
+                self._assignments.pop(room, None)
+
+    def _delete(self, node_id: str, room: str):
+        with self._lock:
+            node = self._nodes.get(node_id)
+        if node is None:
+            return
+        try:
+            requests.delete(f"{node.url}/rooms/{room}", timeout=self.request_timeout_s)
+        except requests.RequestException:
+            pass
+
+    def release(self, room: str):
+        with self._lock:
+            self._pending.discard(room)
+            node_id = self._assignments.pop(room, None)
+        if node_id:
+            self._delete(node_id, room)
+
+    def room_state(self, room: str) -> dict:
+        with self._lock:
+            node_id = self._assignments.get(room)
+            node = self._nodes.get(node_id) if node_id else None
+        if node is None:
+            return {}
+        try:
+            r = requests.get(f"{node.url}/rooms/{room}", timeout=self.request_timeout_s)
+            return r.json() if r.ok else {}
+        except requests.RequestException:
+            return {}
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "nodes": {
+                    nid: {
+                        "url": n.url,
+                        "capacity": n.capacity,
+                        "rooms": sorted(r for r, a in self._assignments.items() if a == nid),
+                        "saturated": n.saturated,
+                        "last_seen_s": round(now - n.last_seen, 1),
+                    }
+                    for nid, n in self._nodes.items()
+                },
+                "pending": sorted(self._pending),
+                **self._stats,
+            }
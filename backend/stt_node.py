@@ -0,0 +1,161 @@
+"""
+One STT worker node: hosts up to --capacity rooms, each with its own
+WhisperRoomSTT, all sharing a single Whisper model. Registers with the
+coordinator (main.py with STT_SHARDED=true) by heartbeat.
+
+Several nodes on one box, for testing:
+    STT_SHARDED=true python main.py
+    python stt_node.py --port 7101 --capacity 2
+    python stt_node.py --port 7102 --capacity 1
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import whisper
+from dotenv import load_dotenv
+from flask import Flask, jsonify, request
+
+from stt import WhisperRoomSTT, settings_from_env
+
+load_dotenv()
+
+
+class STTNode:
+    def __init__(self, *, node_id: str, url: str, capacity: int, coordinator_url: str, whisper_model: str):
+        self.node_id = node_id
+        self.url = url
+        self.capacity = capacity
+        self.coordinator_url = coordinator_url.rstrip("/")
+
+        model = whisper.load_model(whisper_model)
+        executor = ThreadPoolExecutor(max_workers=1)
+        settings = settings_from_env()
+        self._free = [
+            WhisperRoomSTT(
+                livekit_url=os.getenv("LIVEKIT_URL", "ws://localhost:7880"),
+                api_key=os.getenv("LIVEKIT_API_KEY"),
+                api_secret=os.getenv("LIVEKIT_API_SECRET"),
+                whisper_model=whisper_model,
+                model=model,
+                model_executor=executor,
+                **settings,
+            )
+            for _ in range(capacity)
+        ]
+        for w in self._free:
+            w.start_background()
+        self._rooms: dict[str, WhisperRoomSTT] = {}
+        self.rejected_rooms = 0
+        self._lock = threading.Lock()
+
+    def saturated(self) -> bool:
+        with self._lock:
+            return not self._free or any(w.is_saturated() for w in self._rooms.values())
+
+    def join(self, room: str) -> bool:
+        with self._lock:
+            if room in self._rooms:
+                return True
+            # only a second concurrent room is refused; the rooms already here keep running
+            if not self._free or any(w.is_saturated() for w in self._rooms.values()):
+                self.rejected_rooms += 1
+                return False
+            worker = self._free.pop()
+            worker.connect(room_name=room)
+            self._rooms[room] = worker
+            return True
+
+    def leave(self, room: str):
+        with self._lock:
+            worker = self._rooms.pop(room, None)
+            if worker:
+                # the next room must not see this session's last_text, duplicate window or counters
+                worker.disconnect(reset=True)
+                self._free.append(worker)
+
+    def room_state(self, room: str) -> dict | None:
+        with self._lock:
+            worker = self._rooms.get(room)
+        return worker.debug_state() if worker else None
+
+    def heartbeat_loop(self, interval_s: float):
+        while True:
+            with self._lock:
+                rooms = list(self._rooms)
+            try:
+                requests.post(f"{self.coordinator_url}/api/nodes/heartbeat", json={
+                    "node_id": self.node_id,
+                    "url": self.url,
+                    "capacity": self.capacity,
+                    "rooms": rooms,
+                    "saturated": self.saturated(),
+                }, timeout=interval_s)
+            except requests.RequestException:
+                pass
+            time.sleep(interval_s)
+
+
+def create_app(node: STTNode) -> Flask:
+    app = Flask(__name__)
+
+    @app.route("/rooms", methods=["POST"])
+    def join_room():
+        room = ((request.get_json(silent=True) or {}).get("room") or "").strip()
+        if not room:
+            return jsonify({"error": "room is required"}), 400
+        if not node.join(room):
+            return jsonify({"error": "node is full or saturated"}), 503
+        return jsonify({"ok": True, "node_id": node.node_id})
+
+    @app.route("/rooms/<room>", methods=["DELETE"])
+    def leave_room(room):
+        node.leave(room)
+        return jsonify({"ok": True})
+
+    @app.route("/rooms/<room>", methods=["GET"])
+    def room_state(room):
+        state = node.room_state(room)
+        if state is None:
+            return jsonify({"error": "unknown room"}), 404
+        return jsonify(state)
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        return jsonify({
+            "node_id": node.node_id,
+            "capacity": node.capacity,
+            "saturated": node.saturated(),
+            "rejected_rooms": node.rejected_rooms,
+        })
+
+    return app
+
+
+def main():
+    p = argparse.ArgumentParser(description="EchoMind STT worker node")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, required=True)
+    p.add_argument("--capacity", type=int, default=int(os.getenv("STT_NODE_CAPACITY", "2")))
+    p.add_argument("--coordinator", default=os.getenv("STT_COORDINATOR_URL", "http://127.0.0.1:5000"))
+    p.add_argument("--node-id", default=None)
+    p.add_argument("--heartbeat-s", type=float, default=2.0)
+    args = p.parse_args()
+
+    node = STTNode(
+        node_id=args.node_id or f"stt-{uuid.uuid4().hex[:6]}",
+        url=f"http://{args.host}:{args.port}",
+        capacity=args.capacity,
+        coordinator_url=args.coordinator,
+        whisper_model=os.getenv("WHISPER_MODEL", "base"),
+    )
+    threading.Thread(target=node.heartbeat_loop, args=(args.heartbeat_s,), daemon=True).start()
+    create_app(node).run(host=args.host, port=args.port, threaded=True, use_reloader=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Callable
+
+from backend.config import (
+    WEATHER_DEFAULT_LOCATION,
+    TOOL_REFRESH_INTERVAL_S, TOOL_REFRESH_BUDGET, TOOL_REFRESH_TOP_N, TOOL_REFRESH_MIN_SCORE,
+    WEATHER_TTL_S, NEWS_TTL_S,
+)
+from backend.tools.weather_tool import get_weather_raw
+from backend.tools.news_tool import get_news_raw
+
+# Tool outputs that describe a failure; these are never cached.
+ERROR_PREFIXES = ("Weather tool error", "News tool error", "NEWS_API_KEY is missing", "No news results")
+
+
+class ToolCache:
+    """
+    Warm cache for weather/news tool output.
+
+    Every lookup bumps a decaying popularity score for its (tool, arg) key.
+    A background thread refreshes the hottest keys (score >= min_score)
+    before they expire, spending at most `budget` upstream requests per
+    interval, so common questions are served from memory. Keys nobody asks
+    for decay away, seeds included.
+    """
+
+    def __init__(
+        self,
+        fetchers: dict[str, Callable[[str], str]],
+        ttl_s: dict[str, float],
+        *,
+        interval_s: float = 300,
+        budget: int = 10,
+        top_n: int = 20,
+        min_score: float = 0.5,
+        seeds: list[tuple[str, str]] | None = None,
+    ):
+        self.fetchers = fetchers
+        self.ttl_s = ttl_s
+        self.interval_s = interval_s
+        self.budget = budget
+        self.top_n = top_n
+        self.min_score = min_score
+
+        self._lock = threading.Lock()
+        self._data: dict[tuple[str, str], tuple[str, float]] = {}
+        self._args: dict[tuple[str, str], str] = {}
+        self._hits: dict[tuple[str, str], float] = {}
+        self._thread: threading.Thread | None = None
+        self._stats = {"hits": 0, "misses": 0, "refreshed": 0}
+
+        for tool, arg in seeds or []:
+            self._touch(tool, arg)
+
+    @staticmethod
+    def _key(tool: str, arg: str) -> tuple[str, str]:
+        return tool, " ".join((arg or "").lower().split())
+
+    def _touch(self, tool: str, arg: str, weight: float = 1.0) -> tuple[str, str]:
+        key = self._key(tool, arg)
+        self._hits[key] = self._hits.get(key, 0.0) + weight
+        self._args.setdefault(key, (arg or "").strip())
+        return key
+
+    def _fetch(self, key: tuple[str, str]) -> str:
+        raw = self.fetchers[key[0]](self._args[key])
+        if not raw.startswith(ERROR_PREFIXES):
+            with self._lock:
+                self._data[key] = (raw, time.monotonic())
+        return raw
+
+    def get(self, tool: str, arg: str) -> str:
+        with self._lock:
+            key = self._touch(tool, arg)
+            cached = self._data.get(key)
+            if cached and time.monotonic() - cached[1] < self.ttl_s[tool]:
+                self._stats["hits"] += 1
+                return cached[0]
+            self._stats["misses"] += 1
+        return self._fetch(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hot = sorted(self._hits.items(), key=lambda kv: -kv[1])[:5]
+            return dict(self._stats, cached=len(self._data), hot=[f"{t}:{a}" for (t, a), _ in hot])
+
+    def start_background(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh_once()
+            time.sleep(self.interval_s)
+
+    def refresh_once(self) -> int:
+        """Refresh hot keys that would expire before the next pass. Returns upstream requests made."""
+        now = time.monotonic()
+        with self._lock:
+            hot = [k for k in sorted(self._hits, key=lambda k: -self._hits[k])[:self.top_n]
+                   if self._hits[k] >= self.min_score]
+            due = [
+                k for k in hot
+                if k not in self._data or now - self._data[k][1] >= self.ttl_s[k[0]] - self.interval_s
+            ]
+            # decay so yesterday's favourites make room, and forget the long tail
+            self._hits = {k: v * 0.5 for k, v in self._hits.items() if v * 0.5 >= 0.1}
+            self._data = {
+                k: v for k, v in self._data.items()
+                if k in self._hits or now - v[1] < self.ttl_s[k[0]]
+            }
+            self._args = {k: v for k, v in self._args.items() if k in self._hits or k in self._data}
+
+        spent = 0
+        for key in due[:self.budget]:
+            try:
+                self._fetch(key)
+            except Exception:
+                pass
+            spent += 1
+        with self._lock:
+            self._stats["refreshed"] += spent
+        return spent
+
+
+tool_cache = ToolCache(
+    {"weather": get_weather_raw, "news": get_news_raw},
+    {"weather": WEATHER_TTL_S, "news": NEWS_TTL_S},
+    interval_s=TOOL_REFRESH_INTERVAL_S,
+    budget=TOOL_REFRESH_BUDGET,
+    top_n=TOOL_REFRESH_TOP_N,
+    min_score=TOOL_REFRESH_MIN_SCORE,
+    # "" is the topic-less request: default NEWS_COUNTRY top headlines
+    seeds=[("weather", WEATHER_DEFAULT_LOCATION), ("news", "")],
+)
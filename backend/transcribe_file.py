@@ -0,0 +1,233 @@
+"""
+Offline transcription of recorded audio (WAV or raw 16-bit PCM).
+
+The file is memory-mapped, cut into chunks at silences found by an energy
+VAD, and the chunks are transcribed in parallel by a process pool (one
+Whisper model per process). Workers map the file themselves, so only
+offsets cross process boundaries and long files are never loaded into RAM.
+
+    python transcribe_file.py call.wav --workers 4
+    python transcribe_file.py call.pcm --raw --sample-rate 8000
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from whisper_thresholds import NO_SPEECH_PROB, LOGPROB_FLOOR
+
+WHISPER_RATE = 16000
+
+
+@dataclass
+class PcmSource:
+    path: str
+    offset: int        # byte offset of the first sample
+    sample_rate: int
+    channels: int
+    frames: int        # samples per channel
+
+    def map(self) -> np.ndarray:
+        """Read-only (frames, channels) int16 view of the file."""
+        return np.memmap(self.path, dtype="<i2", mode="r", offset=self.offset,
+                         shape=(self.frames, self.channels))
+
+
+def open_wav(path: str) -> PcmSource:
+    """Walk the RIFF chunks for the format and the byte offset of the sample data."""
+    try:
+        return _open_wav(path)
+    except struct.error:
+        # header or a chunk cut short (truncated upload)
+        raise ValueError("truncated WAV header") from None
+
+
+def _open_wav(path: str) -> PcmSource:
+    fmt = None
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError("not a RIFF/WAVE file")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                if size < 16:
+                    raise ValueError("WAV fmt chunk is too short")
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError("WAV has no fmt chunk")
+    audio_format, channels, rate, _, _, bits = fmt
+    if audio_format not in (1, 0xFFFE) or bits != 16:
+        raise ValueError("only 16-bit PCM WAV is supported")
+    if channels < 1 or rate <= 0:
+        raise ValueError("WAV header has no channels or no sample rate")
+    # size may be 0 in streamed recordings; never read past the end of the file
+    available = os.path.getsize(path) - offset
+    frames = (min(size, available) if size else available) // (2 * channels)
+    return PcmSource(path, offset, rate, channels, frames)
+
+
+def open_raw(path: str, sample_rate: int, channels: int = 1) -> PcmSource:
+    frames = os.path.getsize(path) // (2 * channels)
+    return PcmSource(path, 0, sample_rate, channels, frames)
+
+
+def find_cuts(src: PcmSource, *, rms_threshold: int = 500, frame_ms: int = 30,
+              min_silence_ms: int = 300, max_chunk_s: float = 30.0, block_s: float = 60.0) -> list[tuple[int, int]]:
+    """
+    Split into (start, end) sample ranges no longer than max_chunk_s, cutting in
+    the middle of the longest silence in the second half of each window (the
+    whole window if it has none there), ties going to the latest, so chunks
+    stay long and the pool gets few of them. The file is scanned block by
+    block so memory stays bounded.
+    """
+    audio = src.map()
+    step = src.sample_rate * frame_ms // 1000
+    block = max(step, int(block_s * src.sample_rate) // step * step)
+
+    # per-frame silence flags (1 byte per 30 ms, ~115 KB per hour)
+    silent = []
+    for b in range(0, src.frames - step + 1, block):
+        x = audio[b:min(b + block, src.frames)].astype(np.float32).mean(axis=1)
+        n = len(x) // step
+        rms = np.sqrt((x[:n * step].reshape(n, step) ** 2).mean(axis=1))
+        silent.append(rms <= rms_threshold)
+    silent = np.concatenate(silent) if silent else np.zeros(0, dtype=bool)
+
+    # silence runs long enough to cut in: (start_frame, length)
+    runs = []
+    min_frames = max(1, min_silence_ms // frame_ms)
+    i = 0
+    while i < len(silent):
+        if silent[i]:
+            j = i
+            while j < len(silent) and silent[j]:
+                j += 1
+            if j - i >= min_frames:
+                runs.append((i, j - i))
+            i = j
+        else:
+            i += 1
+
+    max_frames = int(max_chunk_s * 1000 // frame_ms)
+    cuts, start = [], 0
+    total = len(silent)
+    while total - start > max_frames:
+        window = [(s, n) for s, n in runs if start < s + n // 2 < start + max_frames]
+        late = [(s, n) for s, n in window if s + n // 2 >= start + max_frames // 2]
+        cut = max(late or window, key=lambda r: (r[1], r[0])) if window else None
+        end = cut[0] + cut[1] // 2 if cut else start + max_frames
+        cuts.append((start, end))
+        start = end
+    cuts.append((start, total))
+
+    ranges = [(s * step, min(e * step, src.frames)) for s, e in cuts]
+    ranges[-1] = (ranges[-1][0], src.frames)
+    # drop chunks that are silence end to end
+    return [(s, e) for s, e in ranges if not silent[s // step:max(s // step + 1, e // step)].all()]
+
+
+_model = None
+
+
+def _init_worker(model_name: str):
+    global _model
+    import torch
+    import whisper
+
+    # one thread per process: parallelism comes from the pool, not intra-op threads
+    torch.set_num_threads(1)
+    _model = whisper.load_model(model_name)
+
+
+def _transcribe_range(src: PcmSource, start: int, end: int, language: str | None) -> list[dict]:
+    x = src.map()[start:end].astype(np.float32).mean(axis=1) / 32768.0
+    if src.sample_rate != WHISPER_RATE:
+        n = int(len(x) * WHISPER_RATE / src.sample_rate)
+        x = np.interp(np.linspace(0, len(x) - 1, n), np.arange(len(x)), x).astype(np.float32)
+
+    result = _model.transcribe(x, fp16=False, language=language, condition_on_previous_text=False)
+    offset = start / src.sample_rate
+    out = []
+    for seg in result.get("segments") or []:
+        if seg.get("no_speech_prob", 0.0) > NO_SPEECH_PROB and seg.get("avg_logprob", 0.0) < LOGPROB_FLOOR:
+            continue
+        text = (seg.get("text") or "").strip()
+        if text:
+            out.append({"start": round(offset + seg["start"], 2), "end": round(offset + seg["end"], 2), "text": text})
+    return out
+
+
+_pools: dict[tuple[str, int], ProcessPoolExecutor] = {}
+
+
+def _pool(model_name: str, workers: int) -> ProcessPoolExecutor:
+    # spawn, not fork: the parent may already hold torch threads (live STT worker)
+    key = (model_name, workers)
+    if key not in _pools:
+        _pools[key] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name,),
+        )
+    return _pools[key]
+
+
+def transcribe_file(src: PcmSource, *, model_name: str = "base", workers: int | None = None,
+                    language: str | None = "en", max_chunk_s: float = 30.0) -> dict:
+    ranges = find_cuts(src, max_chunk_s=max_chunk_s)
+    pool = _pool(model_name, workers or os.cpu_count() or 1)
+    futures = [pool.submit(_transcribe_range, src, s, e, language) for s, e in ranges]
+
+    segments = []
+    for f in futures:
+        segments.extend(f.result())
+    return {
+        "duration_s": round(src.frames / src.sample_rate, 2),
+        "chunks": len(ranges),
+        "segments": segments,
+        "text": " ".join(s["text"] for s in segments),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Transcribe a recorded WAV/PCM file with Whisper.")
+    p.add_argument("path")
+    p.add_argument("--raw", action="store_true", help="headerless 16-bit little-endian PCM")
+    p.add_argument("--sample-rate", type=int, default=WHISPER_RATE)
+    p.add_argument("--channels", type=int, default=1)
+    p.add_argument("--model", default=os.getenv("WHISPER_MODEL", "base"))
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--language", default="en")
+    p.add_argument("--json", action="store_true", help="print full JSON instead of timestamped lines")
+    args = p.parse_args()
+
+    src = open_raw(args.path, args.sample_rate, args.channels) if args.raw else open_wav(args.path)
+    res = transcribe_file(src, model_name=args.model, workers=args.workers, language=args.language)
+
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        for s in res["segments"]:
+            print(f"[{s['start']:8.2f} → {s['end']:8.2f}] {s['text']}")
+
+
+if __name__ == "__main__":
+    main()
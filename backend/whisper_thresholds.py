@@ -0,0 +1,7 @@
+"""
+Whisper's own decode-fallback thresholds, shared by the live worker (stt.py)
+and offline transcription (transcribe_file.py) so both drop the same segments.
+"""
+NO_SPEECH_PROB = 0.6
+LOGPROB_FLOOR = -1.0
+COMPRESSION_RATIO_MAX = 2.4